@@ -1,12 +1,31 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import os
-from PIL import Image
+from PIL import Image, ImageOps
 import json
 from datetime import datetime
 import requests
 import zipfile
+import zlib
+import struct
 import io
+import bisect
+import atexit
+import sqlite3
+import threading
+import tempfile
+import importlib.util
+import functools
+import collections
+from urllib.parse import urlparse, quote
+from concurrent.futures import ThreadPoolExecutor
+
+# orjson parses the legacy JSON progress files faster; fall back to json without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Configure the page
 st.set_page_config(
@@ -16,8 +35,38 @@ st.set_page_config(
 )
 
 # File paths - these will be loaded from cloud storage
+PROGRESS_DB = 'coding_progress.db'
+# Original JSON progress file, imported into PROGRESS_DB once
 PROGRESS_FILE = 'coding_progress.json'
 OUTPUT_FILE = 'ra-shingle-complete.csv'
+PARQUET_OUTPUT_FILE = 'ra-shingle-complete.parquet'
+
+# Thumbnails are generated here once and served by Streamlit's static file server
+STATIC_IMAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'thumbs')
+STATIC_IMAGE_URL = '/app/static/thumbs/'
+
+# Longest edge and JPEG quality of display thumbnails (the image column is narrow)
+THUMBNAIL_SIZE = 800
+THUMBNAIL_QUALITY = 85
+
+# Parquet import/export needs pyarrow; fall back to CSV without it
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+# Number of upcoming images to decode in the background
+PREFETCH_AHEAD = 3
+DISPLAY_CACHE_SIZE = 16
+
+# Remote ZIP reads: tail covers the end-of-central-directory record and comment
+ZIP_TAIL_SIZE = 66 * 1024
+ZIP_READ_AHEAD = 64 * 1024
+# Room for a local file header (30 bytes + name + extra)
+ZIP_LOCAL_HEADER_ROOM = 1024
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# (connect, read) timeout in seconds for every request
+HTTP_TIMEOUT = (5, 60)
+
+# Marks an image with no category/context in the int8 label arrays
+UNSET = -1
 
 # Category definitions
 CATEGORIES = {
@@ -33,7 +82,192 @@ CONTEXT_CATEGORIES = {
     2: "Congress"
 }
 
-@st.cache_data
+# Button (code, label, key) tables, built once instead of formatted per button per run
+CATEGORY_BUTTONS = tuple(
+    (code, f"{code}: {description}", f"btn_{code}") for code, description in CATEGORIES.items()
+)
+CONTEXT_BUTTONS = (
+    (1, "📺 Newscast", "newscast_btn"),
+    (2, "🏛️ Congress", "congress_btn")
+)
+
+@st.cache_resource
+def get_http_session():
+    """One keep-alive session for every download, so TLS handshakes are reused"""
+    return requests.Session()
+
+@st.cache_data(show_spinner=False)
+def load_metadata(csv_url):
+    """Download and parse the metadata file once, reusing the DataFrame on reruns"""
+    csv_response = get_http_session().get(csv_url, timeout=HTTP_TIMEOUT)
+    csv_response.raise_for_status()
+    
+    # Prefer Parquet when the source is published in that format
+    if HAS_PYARROW and urlparse(csv_url).path.endswith('.parquet'):
+        return pd.read_parquet(io.BytesIO(csv_response.content))
+    return pd.read_csv(io.StringIO(csv_response.text))
+
+class HTTPRangeFile:
+    """Read-only, seekable view of a remote file backed by HTTP Range requests"""
+
+    def __init__(self, url, tail_response, session):
+        self.url = url
+        self.session = session
+        # Content-Range looks like "bytes 1234-5678/5679"
+        content_range = tail_response.headers['Content-Range']
+        self.size = int(content_range.rsplit('/', 1)[1])
+        # If-Range needs a strong validator; fall back to Last-Modified
+        etag = tail_response.headers.get('ETag')
+        if etag and etag.startswith('W/'):
+            etag = None
+        self.validator = etag or tail_response.headers.get('Last-Modified')
+        self.tail = tail_response.content
+        self.tail_start = self.size - len(self.tail)
+        self.buffer = b''
+        self.buffer_start = 0
+        self.pos = 0
+        # Set once the remote file no longer matches what was opened
+        self.stale = False
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self.pos = offset
+        return self.pos
+
+    def fetch(self, start, end):
+        """Download bytes [start, end) of the remote file, checking it hasn't changed"""
+        headers = {'Range': f'bytes={start}-{end - 1}'}
+        if self.validator:
+            headers['If-Range'] = self.validator
+        response = self.session.get(self.url, headers=headers, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+        # A 200 here means the file changed since the tail was read (If-Range)
+        content_range = response.headers.get('Content-Range', '')
+        expected = f'bytes {start}-{end - 1}/{self.size}'
+        if (response.status_code != 206 or content_range != expected
+                or len(response.content) != end - start):
+            self.stale = True
+            raise OSError(f"Remote archive changed: HTTP {response.status_code}, Content-Range {content_range!r}")
+        return response.content
+
+    def read_at(self, offset, size):
+        """Read bytes [offset, offset + size) without touching pos or the buffer, so no lock is needed"""
+        end = min(offset + size, self.size)
+        if offset >= end:
+            return b''
+        if offset >= self.tail_start:
+            return self.tail[offset - self.tail_start:end - self.tail_start]
+        return self.fetch(offset, end)
+
+    def read(self, size=-1):
+        remaining = max(0, self.size - self.pos)
+        size = remaining if size is None or size < 0 else min(size, remaining)
+        if size == 0:
+            return b''
+        start, end = self.pos, self.pos + size
+        if start >= self.tail_start:
+            data = self.tail[start - self.tail_start:end - self.tail_start]
+        elif self.buffer_start <= start and end <= self.buffer_start + len(self.buffer):
+            data = self.buffer[start - self.buffer_start:end - self.buffer_start]
+        else:
+            # Read ahead so zipfile's small header reads share one request
+            self.buffer = self.fetch(start, min(max(end, start + ZIP_READ_AHEAD), self.size))
+            self.buffer_start = start
+            data = self.buffer[:size]
+        self.pos = end
+        return data
+
+class ImageArchive:
+    """The images ZIP opened once, with members indexed by basename"""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.lock = threading.Lock()
+        self.zip_file = zipfile.ZipFile(fileobj)
+        self.index = {}
+        for file_info in self.zip_file.filelist:
+            if file_info.is_dir():
+                continue
+            # Keep the first match, like the original filelist scan
+            self.index.setdefault(os.path.basename(file_info.filename), file_info)
+        # Recently decoded display images, held by reference (never pickled)
+        self.display_image = functools.lru_cache(maxsize=DISPLAY_CACHE_SIZE)(self.decode)
+
+    def read(self, filename):
+        """Return the raw bytes of an image matched by basename, or None"""
+        file_info = self.index.get(filename)
+        if file_info is None:
+            return None
+        # Images are usually stored uncompressed; skip zipfile's stream
+        # machinery for those (encrypted entries still go through zipfile)
+        if file_info.compress_type == zipfile.ZIP_STORED and not file_info.flag_bits & 0x1:
+            image_bytes = self.read_stored(file_info)
+            if image_bytes is not None:
+                return image_bytes
+        with self.lock:
+            return self.zip_file.read(file_info)
+
+    def read_stored(self, file_info):
+        """Read a stored member with its local header in one read, or None if the header does not fit"""
+        length = ZIP_LOCAL_HEADER_ROOM + file_info.compress_size
+        # Duck-typed: Streamlit reruns redefine HTTPRangeFile, so isinstance
+        # fails for the archive cached by an earlier run
+        if hasattr(self.fileobj, 'read_at'):
+            data = self.fileobj.read_at(file_info.header_offset, length)
+        else:
+            with self.lock:
+                self.fileobj.seek(file_info.header_offset)
+                data = self.fileobj.read(length)
+        if data[:4] != b'PK\x03\x04':
+            return None
+        name_len, extra_len = struct.unpack_from('<HH', data, 26)
+        start = 30 + name_len + extra_len
+        end = start + file_info.compress_size
+        if end > len(data):
+            return None
+        image_bytes = data[start:end]
+        if zlib.crc32(image_bytes) != file_info.CRC:
+            raise zipfile.BadZipFile(f"Bad CRC-32 for file {file_info.filename!r}")
+        return image_bytes
+
+    def decode(self, filename):
+        """Read and decode an image to display size, or None if it's missing"""
+        image_bytes = self.read(filename)
+        if image_bytes is None:
+            return None
+        return make_display_image(image_bytes)
+
+def spool_response(response):
+    """Stream a response body into an anonymous temp file, rewound for reading"""
+    spool = tempfile.TemporaryFile()
+    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+@st.cache_resource(show_spinner=False)
+def load_image_archive(images_zip_url):
+    """Open the images ZIP once per process, over HTTP Range if the server allows it"""
+    session = get_http_session()
+    response = session.get(
+        images_zip_url, headers={'Range': f'bytes=-{ZIP_TAIL_SIZE}'}, stream=True, timeout=HTTP_TIMEOUT
+    )
+    response.raise_for_status()
+    if response.status_code == 206:
+        return ImageArchive(HTTPRangeFile(images_zip_url, response, session))
+    return ImageArchive(spool_response(response))
+
 def load_data_from_cloud():
     """Load CSV and download ZIP file info (but not extract all images)"""
     try:
@@ -41,49 +275,121 @@ def load_data_from_cloud():
         csv_url = st.secrets["data_files"]["csv_url"]
         images_zip_url = st.secrets["data_files"]["images_zip_url"]
         
-        # Download CSV
-        csv_response = requests.get(csv_url)
-        csv_response.raise_for_status()
+        # Both loaders are cached, so reruns are two cache hits
+        if 'data_loaded' in st.session_state:
+            return load_metadata(csv_url), load_image_archive(images_zip_url)
         
-        # Create DataFrame from downloaded CSV
-        metadata_df = pd.read_csv(io.StringIO(csv_response.text))
+        # First run of a session (possibly a cold start): open the archive in
+        # the background while the metadata downloads and parses, so startup
+        # takes the longer of the two rather than their sum
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            archive_future = pool.submit(load_image_archive, images_zip_url)
+            metadata_df = load_metadata(csv_url)
+            archive = archive_future.result()
+        st.session_state.data_loaded = True
         
-        # Download ZIP file but don't extract yet - just store the raw data
-        zip_response = requests.get(images_zip_url)
-        zip_response.raise_for_status()
-        
-        # Store ZIP data for on-demand extraction
-        zip_data = zip_response.content
-        
-        return metadata_df, zip_data
+        return metadata_df, archive
         
     except Exception as e:
         st.error(f"Error loading data from cloud storage: {e}")
         st.info("Make sure your Streamlit secrets are configured correctly.")
         return None, None
 
-@st.cache_data
-def load_single_image(zip_data, filename):
-    """Load a single image from ZIP data on-demand"""
+def make_display_image(image_bytes):
+    """Decode image bytes into an upright RGB image bounded to THUMBNAIL_SIZE"""
+    img = Image.open(io.BytesIO(image_bytes))
+    # For JPEGs, let libjpeg scale by 1/2, 1/4 or 1/8 while decoding. Without
+    # this, thumbnail() drafts at twice the target size, which for typical
+    # photos still means a full-resolution decode.
+    img.draft('RGB', (THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+    img.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.Resampling.LANCZOS)
+    # Re-encoding drops EXIF, so apply the camera orientation now
+    img = ImageOps.exif_transpose(img)
+    if img.mode in ('RGBA', 'LA', 'P'):
+        # Flatten transparency onto white so it doesn't turn black as JPEG
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, 'white')
+        background.paste(img, mask=img.getchannel('A'))
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+    return img
+
+def load_single_image(archive, filename):
+    """Return the image's static URL, or the decoded image if it can't be published"""
     try:
-        with zipfile.ZipFile(io.BytesIO(zip_data)) as zip_file:
-            # Find the file in the ZIP
-            for file_info in zip_file.filelist:
-                if os.path.basename(file_info.filename) == filename:
-                    with zip_file.open(file_info) as image_file:
-                        return Image.open(io.BytesIO(image_file.read()))
-        return None
+        return publish_static_image(archive, filename) or archive.display_image(filename)
     except Exception as e:
+        if getattr(archive.fileobj, 'stale', False):
+            # The ZIP was replaced on the server; reopen it and redraw the page
+            load_image_archive.clear()
+            st.rerun(scope="app")
         st.error(f"Error loading image {filename}: {e}")
         return None
 
+@st.cache_resource
+def get_published_thumbnails():
+    """Names of thumbnails already in the static folder, listed once per process"""
+    try:
+        return set(os.listdir(STATIC_IMAGE_DIR))
+    except OSError:
+        return set()
+
+def publish_static_image(archive, filename):
+    """Write a display thumbnail into the static folder once and return its URL (or None)"""
+    file_info = archive.index.get(filename)
+    if file_info is None:
+        return None
+    # Name thumbnails by the member's CRC too, so a replaced archive that
+    # reuses a filename never serves the old picture
+    thumb_name = f"{os.path.splitext(filename)[0]}.{file_info.CRC:08x}.jpg"
+    published = get_published_thumbnails()
+    # Already written: skip the filesystem entirely
+    if thumb_name in published:
+        return STATIC_IMAGE_URL + quote(thumb_name)
+    target_path = os.path.join(STATIC_IMAGE_DIR, thumb_name)
+    if not os.path.exists(target_path):
+        # Read and decode errors propagate; the decode is cached, so a failed
+        # write falls back to it without fetching the image again
+        img = archive.display_image(filename)
+        if img is None:
+            return None
+        try:
+            os.makedirs(STATIC_IMAGE_DIR, exist_ok=True)
+            # Write to a temp file first so a half-written image is never served
+            fd, tmp_path = tempfile.mkstemp(dir=STATIC_IMAGE_DIR, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                img.save(f, 'JPEG', quality=THUMBNAIL_QUALITY)
+            os.replace(tmp_path, target_path)
+        except OSError:
+            return None
+    published.add(thumb_name)
+    return STATIC_IMAGE_URL + quote(thumb_name)
+
+@st.cache_resource
+def get_prefetch_executor():
+    """Shared worker pool used to warm the image cache ahead of navigation"""
+    return ThreadPoolExecutor(max_workers=2)
+
+def prefetch_image(archive, filename):
+    """Publish one image, or warm the decode cache if it can't be served statically"""
+    publish_static_image(archive, filename) or archive.display_image(filename)
+
+def prefetch_images(basenames, archive, start_idx):
+    """Extract the next few images in the background so Next is served instantly"""
+    executor = get_prefetch_executor()
+    for filename_only in basenames[start_idx:start_idx + PREFETCH_AHEAD]:
+        executor.submit(prefetch_image, archive, filename_only)
+
 def save_to_cloud_csv(metadata_df):
     """Save the updated CSV back to cloud storage"""
     try:
         # For now, we'll save locally and provide download link
         # Cloud storage writing requires additional authentication
-        csv_buffer = io.StringIO()
-        metadata_df.to_csv(csv_buffer, index=False)
+        # Encode straight into bytes rather than building a str and encoding it again
+        csv_buffer = io.BytesIO()
+        # Write in row batches so large exports don't stringify every row at once
+        metadata_df.to_csv(csv_buffer, index=False, chunksize=10000)
         
         return csv_buffer.getvalue()
         
@@ -91,159 +397,217 @@ def save_to_cloud_csv(metadata_df):
         st.error(f"Error preparing CSV for download: {e}")
         return None
 
-def load_metadata():
-    """Load the metadata from cloud storage"""
-    return None  # This function is now handled by load_data_from_cloud()
+def loads_json(data):
+    """Parse JSON bytes, using orjson when it's installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps_json(data):
+    """Serialize to indented JSON bytes, using orjson when it's installed"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode()
+
+class ProgressStore:
+    """SQLite progress table (WAL mode) shared by all sessions"""
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS progress ("
+            "idx INTEGER PRIMARY KEY, group_label INTEGER, context INTEGER, ts TEXT)"
+        )
+        self.conn.commit()
+
+    def load(self):
+        """Return every saved (idx, group_label, context) row"""
+        with self.lock:
+            return self.conn.execute("SELECT idx, group_label, context FROM progress").fetchall()
+
+    def save(self, rows):
+        """Insert or replace (idx, group_label, context) rows in one transaction"""
+        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO progress VALUES (?, ?, ?, ?)",
+                [(idx, group_label, context, ts) for idx, group_label, context in rows]
+            )
+
+    def delete(self, idx):
+        """Remove the row for one image"""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM progress WHERE idx = ?", (idx,))
 
-def load_progress():
-    """Load existing progress from JSON file"""
+@st.cache_resource
+def get_progress_store():
+    """Shared progress store, importing any JSON progress once and closed at shutdown"""
+    store = ProgressStore(PROGRESS_DB)
     if os.path.exists(PROGRESS_FILE):
-        with open(PROGRESS_FILE, 'r') as f:
-            return json.load(f)
-    return {}
+        import_json_progress(store)
+    atexit.register(store.conn.close)
+    return store
 
-def save_progress(progress_data):
-    """Save progress to JSON file"""
-    with open(PROGRESS_FILE, 'w') as f:
-        json.dump(progress_data, f, indent=2)
+def save_to_parquet(metadata_df):
+    """Serialize results to zstd-compressed Parquet for download"""
+    if not HAS_PYARROW:
+        return None
+    try:
+        parquet_buffer = io.BytesIO()
+        metadata_df.to_parquet(parquet_buffer, compression='zstd', index=False)
+        
+        return parquet_buffer.getvalue()
+        
+    except Exception as e:
+        st.warning(f"Parquet export unavailable, use the CSV download instead: {e}")
+        return None
+
+def import_json_progress(store):
+    """Copy progress from the old coding_progress.json into the store"""
+    with open(PROGRESS_FILE, 'rb') as f:
+        progress_data = loads_json(f.read())
+    rows = []
+    for idx, data in progress_data.items():
+        if not idx.isdigit():
+            continue
+        # The oldest format stored just the group label
+        if not isinstance(data, dict):
+            data = {'group_label': data, 'context': None}
+        rows.append((int(idx), data.get('group_label'), data.get('context')))
+    store.save(rows)
+    # Keep the old file, renamed so the import only ever runs once
+    os.replace(PROGRESS_FILE, PROGRESS_FILE + '.imported')
+
+def progress_from_rows(rows):
+    """Build the JSON progress layout from (idx, group_label, context) rows"""
+    return {
+        str(idx): {'group_label': group_label, 'context': context}
+        for idx, group_label, context in rows
+    }
+
+def progress_backup_json(store):
+    """Serialize everything saved in the store as the backup JSON document"""
+    return dumps_json(progress_from_rows(store.load()))
+
+def label_column(labels):
+    """Wrap an int8 label array as a nullable Int8 column, UNSET becoming <NA>"""
+    return pd.arrays.IntegerArray(labels, labels == UNSET)
 
 def save_final_results(metadata_df, coded_labels, context_labels):
     """Save final results to CSV for download"""
-    metadata_df['group_labels'] = coded_labels
-    metadata_df['context_labels'] = context_labels
+    metadata_df['group_labels'] = label_column(coded_labels)
+    metadata_df['context_labels'] = label_column(context_labels)
     metadata_df['coding_timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
-    # Prepare CSV for download
-    csv_data = save_to_cloud_csv(metadata_df)
+    # Prepare Parquet (smaller, faster) now; the CSV is only built if it's needed
+    parquet_data = save_to_parquet(metadata_df)
+    if parquet_data:
+        st.download_button(
+            label="💾 Download Completed Results (Parquet)",
+            data=parquet_data,
+            file_name=PARQUET_OUTPUT_FILE,
+            mime="application/vnd.apache.parquet",
+            type="primary"
+        )
+        # Deferred: serialized only if the CSV is actually downloaded
+        csv_data = functools.partial(save_to_cloud_csv, metadata_df)
+    else:
+        csv_data = save_to_cloud_csv(metadata_df)
     if csv_data:
         st.download_button(
             label="💾 Download Completed Results CSV",
             data=csv_data,
             file_name=OUTPUT_FILE,
             mime="text/csv",
-            type="primary"
+            type="secondary" if parquet_data else "primary"
         )
+    if parquet_data or csv_data:
         st.success("Results prepared for download! Click the button above to save your completed coding.")
-        st.info("📧 Please email this completed CSV file back to the research team.")
+        st.info("📧 Please email this completed results file back to the research team.")
 
-def main():
-    st.title("📸 Image Coding Tool")
-    st.markdown("### Instructions")
-    st.markdown("""
-    **Please categorize each image based on the number of people visible:**
-    - **0 = Infographic**: No human figures visible or 50%+ text.
-    - **1 = Solo**: One person is focus.
-    - **2 = Small group**: Multiple people all presented as equal.  
-    - **3 = Crowd**: No focal person, focal person attempting to appear as the central person in a crowd.
-    
-    **Additionally, if applicable, mark the context:**
-    - **Newscast**: Image appears to be from a television news broadcast (not CSPAN)
-    - **Congress**: Image appears to be taken in a congressional setting or CSPAN
-    *(These are mutually exclusive - select only one if applicable)*
-    
-    If you're unsure, make a selection, but note the filename and your confusion in a separate document.
-    """)
-    
-    # Load data from cloud storage
-    with st.spinner("Loading data from cloud storage..."):
-        metadata_df, zip_data = load_data_from_cloud()
-    
-    if metadata_df is None or zip_data is None:
-        st.error("Failed to load data. Please check your configuration.")
+def mark_coded(uncoded_indices, idx):
+    """Remove an index from the sorted list of uncoded images"""
+    pos = bisect.bisect_left(uncoded_indices, idx)
+    if pos < len(uncoded_indices) and uncoded_indices[pos] == idx:
+        del uncoded_indices[pos]
+
+def mark_uncoded(uncoded_indices, idx):
+    """Add an index back to the sorted list of uncoded images"""
+    pos = bisect.bisect_left(uncoded_indices, idx)
+    if pos == len(uncoded_indices) or uncoded_indices[pos] != idx:
+        uncoded_indices.insert(pos, idx)
+
+def count_labels(labels):
+    """Count each code in an int8 label array, ignoring UNSET"""
+    return collections.Counter(
+        {code: int(count) for code, count in enumerate(np.bincount(labels[labels != UNSET])) if count}
+    )
+
+def assign_label(labels, counts, idx, value):
+    """Set one entry of a label array, keeping its running counts in step"""
+    old = labels[idx]
+    if old == value:
         return
-    
-    progress_data = load_progress()
-    
-    # Initialize session state
-    if 'current_index' not in st.session_state:
-        st.session_state.current_index = 0
-    if 'coded_labels' not in st.session_state:
-        st.session_state.coded_labels = [None] * len(metadata_df)
-        # Load any existing progress
-        for idx, data in progress_data.items():
-            if idx.isdigit() and int(idx) < len(metadata_df):
-                if isinstance(data, dict):
-                    # New format with group_label and context
-                    st.session_state.coded_labels[int(idx)] = data.get('group_label')
-                else:
-                    # Old format (just the label)
-                    st.session_state.coded_labels[int(idx)] = data
-    if 'context_labels' not in st.session_state:
-        st.session_state.context_labels = [None] * len(metadata_df)
-        # Load any existing context progress
-        for idx, data in progress_data.items():
-            if idx.isdigit() and int(idx) < len(metadata_df):
-                if isinstance(data, dict) and 'context' in data:
-                    st.session_state.context_labels[int(idx)] = data['context']
-    
-    # Auto-jump to first uncoded image on app start
-    if 'has_auto_jumped' not in st.session_state:
-        st.session_state.has_auto_jumped = True
-        # Find first uncoded image
-        for i, label in enumerate(st.session_state.coded_labels):
-            if label is None:
-                st.session_state.current_index = i
-                break
-    
-    total_images = len(metadata_df)
+    if old != UNSET:
+        counts[int(old)] -= 1
+        if not counts[int(old)]:
+            del counts[int(old)]
+    if value != UNSET:
+        counts[value] += 1
+    labels[idx] = value
+
+def label_or_none(value):
+    """Convert an int8 label array entry to a plain int, or None when unset"""
+    return None if value == UNSET else int(value)
+
+def commit_progress(idx):
+    """Persist one image's labels from the label arrays (deleting the row if cleared)"""
+    group_label = label_or_none(st.session_state.coded_labels[idx])
+    context = label_or_none(st.session_state.context_labels[idx])
+    if group_label is None and context is None:
+        get_progress_store().delete(idx)
+    else:
+        get_progress_store().save([(idx, group_label, context)])
+
+def go_to_image(idx):
+    """Button callback: move to another image"""
+    st.session_state.current_index = idx
+
+def set_category(idx, code):
+    """Button callback: record the category for an image"""
+    assign_label(st.session_state.coded_labels, st.session_state.label_counts, idx, code)
+    mark_coded(st.session_state.uncoded_indices, idx)
+    commit_progress(idx)
+
+def toggle_context(idx, context):
+    """Button callback: set a context for an image, or unset it if already active"""
+    if st.session_state.context_labels[idx] == context:
+        context = UNSET
+    assign_label(st.session_state.context_labels, st.session_state.context_counts, idx, context)
+    commit_progress(idx)
+
+@st.fragment
+def coding_panel(archive):
+    """Show the current image with its controls; category and context clicks rerun only this fragment"""
+    basenames = st.session_state.basenames
+    total_images = len(basenames)
     current_idx = st.session_state.current_index
+    uncoded_indices = st.session_state.uncoded_indices
     
-    # Progress display
-    coded_count = sum(1 for label in st.session_state.coded_labels if label is not None)
-    progress_percent = coded_count / total_images
-    
-    st.markdown("---")
-    col1, col2, col3 = st.columns([2, 1, 1])
-    
-    with col1:
-        st.progress(progress_percent)
-        st.write(f"Progress: {coded_count}/{total_images} images coded ({progress_percent:.1%})")
-    
-    with col2:
-        if st.button("⬅️ Previous", disabled=(current_idx == 0)):
-            st.session_state.current_index = max(0, current_idx - 1)
-            st.rerun()
-    
-    with col3:
-        if st.button("➡️ Next", disabled=(current_idx >= total_images - 1)):
-            st.session_state.current_index = min(total_images - 1, current_idx + 1)
-            st.rerun()
-    
-    # Jump to specific image
-    with st.expander("Jump to specific image"):
-        col1, col2 = st.columns(2)
-        with col1:
-            jump_to = st.number_input("Go to image number:", min_value=1, max_value=total_images, value=current_idx + 1)
-            if st.button("Go"):
-                st.session_state.current_index = jump_to - 1
-                st.rerun()
-        with col2:
-            if st.button("🎯 Go to next uncoded"):
-                # Find next uncoded image
-                next_uncoded = None
-                for i in range(current_idx + 1, total_images):
-                    if st.session_state.coded_labels[i] is None:
-                        next_uncoded = i
-                        break
-                if next_uncoded is not None:
-                    st.session_state.current_index = next_uncoded
-                    st.rerun()
-                else:
-                    st.info("No uncoded images found after current position")
-    
-    st.markdown("---")
-    
-    # Current image display
     if current_idx < total_images:
-        row = metadata_df.iloc[current_idx]
-        filename = row['filename']
+        filename_only = basenames[current_idx]
         
         st.subheader(f"Image {current_idx + 1} of {total_images}")
-        st.write(f"**Filename:** {os.path.basename(filename)}")
+        st.write(f"**Filename:** {filename_only}")
         
-        # Display image
-        filename_only = os.path.basename(filename)
-        img = load_single_image(zip_data, filename_only)
+        # Display image - served as a static file, decoded here only as a fallback
+        img = load_single_image(archive, filename_only)
+        
+        # Prepare the images a coder is likely to open next
+        prefetch_images(basenames, archive, current_idx + 1)
         
         if img is not None:
             try:
@@ -259,23 +623,14 @@ def main():
                 cols = st.columns(4)
                 current_label = st.session_state.coded_labels[current_idx]
                 
-                for i, (code, description) in enumerate(CATEGORIES.items()):
+                for i, (code, label, key) in enumerate(CATEGORY_BUTTONS):
                     with cols[i]:
                         button_type = "primary" if current_label == code else "secondary"
-                        if st.button(f"{code}: {description}", key=f"btn_{code}", type=button_type):
-                            st.session_state.coded_labels[current_idx] = code
-                            
-                            # Save progress
-                            progress_data[str(current_idx)] = {
-                                'group_label': code,
-                                'context': st.session_state.context_labels[current_idx]
-                            }
-                            save_progress(progress_data)
-                            
-                            st.rerun()
+                        st.button(label, key=key, type=button_type,
+                                  on_click=set_category, args=(current_idx, code))
                 
                 # Show current selection
-                if current_label is not None:
+                if current_label != UNSET:
                     st.success(f"✅ Current selection: {current_label} - {CATEGORIES[current_label]}")
                 else:
                     st.info("⏳ No category selected yet")
@@ -287,178 +642,236 @@ def main():
                 # Context toggle buttons
                 context_cols = st.columns(3)
                 
-                with context_cols[0]:
-                    newscast_active = current_context == 1
-                    if st.button("📺 Newscast", key="newscast_btn", type="primary" if newscast_active else "secondary"):
-                        if newscast_active:
-                            st.session_state.context_labels[current_idx] = None
-                        else:
-                            st.session_state.context_labels[current_idx] = 1
-                        
-                        # Save progress
-                        progress_data[str(current_idx)] = {
-                            'group_label': st.session_state.coded_labels[current_idx],
-                            'context': st.session_state.context_labels[current_idx]
-                        }
-                        save_progress(progress_data)
-                        st.rerun()
-                
-                with context_cols[1]:
-                    congress_active = current_context == 2
-                    if st.button("🏛️ Congress", key="congress_btn", type="primary" if congress_active else "secondary"):
-                        if congress_active:
-                            st.session_state.context_labels[current_idx] = None
-                        else:
-                            st.session_state.context_labels[current_idx] = 2
-                        
-                        # Save progress
-                        progress_data[str(current_idx)] = {
-                            'group_label': st.session_state.coded_labels[current_idx],
-                            'context': st.session_state.context_labels[current_idx]
-                        }
-                        save_progress(progress_data)
-                        st.rerun()
+                for i, (code, label, key) in enumerate(CONTEXT_BUTTONS):
+                    with context_cols[i]:
+                        button_type = "primary" if current_context == code else "secondary"
+                        st.button(label, key=key, type=button_type,
+                                  on_click=toggle_context, args=(current_idx, code))
                 
                 with context_cols[2]:
-                    if current_context is not None:
+                    if current_context != UNSET:
                         st.info(f"✅ Context: {CONTEXT_CATEGORIES[current_context]}")
                     else:
                         st.info("No context selected")
                 
                 # Auto-advance button (manual control) - moved below context
-                if current_label is not None:
+                if current_label != UNSET:
                     # Create columns to right-align the button
                     nav_cols = st.columns([3, 1])
                     with nav_cols[1]:  # Right column
                         if st.button("➡️ Next Image", key="advance_btn", type="primary"):
                             if current_idx < total_images - 1:
                                 st.session_state.current_index = current_idx + 1
+                            # Full rerun so the progress bar and navigation update too
                             st.rerun()
                 
                 # Clear selection button
-                if current_label is not None or current_context is not None:
+                if current_label != UNSET or current_context != UNSET:
                     if st.button("🗑️ Clear all selections", key="clear_btn"):
-                        st.session_state.coded_labels[current_idx] = None
-                        st.session_state.context_labels[current_idx] = None
-                        if str(current_idx) in progress_data:
-                            del progress_data[str(current_idx)]
-                        save_progress(progress_data)
+                        assign_label(st.session_state.coded_labels, st.session_state.label_counts, current_idx, UNSET)
+                        assign_label(st.session_state.context_labels, st.session_state.context_counts, current_idx, UNSET)
+                        mark_uncoded(uncoded_indices, current_idx)
+                        commit_progress(current_idx)
                         st.rerun()
                 
             except Exception as e:
                 st.error(f"Error displaying image: {e}")
         else:
             st.error(f"Image not found: {filename_only}")
+
+def main():
+    st.title("📸 Image Coding Tool")
+    st.markdown("### Instructions")
+    st.markdown("""
+    **Please categorize each image based on the number of people visible:**
+    - **0 = Infographic**: No human figures visible or 50%+ text.
+    - **1 = Solo**: One person is focus.
+    - **2 = Small group**: Multiple people all presented as equal.  
+    - **3 = Crowd**: No focal person, focal person attempting to appear as the central person in a crowd.
     
-    # Summary and export
-    st.markdown("---")
-    st.subheader("Summary")
+    **Additionally, if applicable, mark the context:**
+    - **Newscast**: Image appears to be from a television news broadcast (not CSPAN)
+    - **Congress**: Image appears to be taken in a congressional setting or CSPAN
+    *(These are mutually exclusive - select only one if applicable)*
     
-    # Count by category
-    label_counts = {}
-    for label in st.session_state.coded_labels:
-        if label is not None and not isinstance(label, dict):
-            label_counts[label] = label_counts.get(label, 0) + 1
+    If you're unsure, make a selection, but note the filename and your confusion in a separate document.
+    """)
     
-    # Count by context
-    context_counts = {}
-    for context in st.session_state.context_labels:
-        if context is not None and not isinstance(context, dict):
-            context_counts[context] = context_counts.get(context, 0) + 1
+    # Load data from cloud storage
+    with st.spinner("Loading data from cloud storage..."):
+        metadata_df, archive = load_data_from_cloud()
     
-    col1, col2 = st.columns(2)
+    if metadata_df is None or archive is None:
+        st.error("Failed to load data. Please check your configuration.")
+        return
     
-    with col1:
-        st.write("**People Categories:**")
-        if label_counts:
-            for code, count in sorted(label_counts.items()):
-                st.write(f"• {CATEGORIES[code]}: {count} images")
-        else:
-            st.write("No images coded yet")
+    # Initialize session state
+    if 'current_index' not in st.session_state:
+        st.session_state.current_index = 0
+    # Image basenames, computed once per session instead of per row per rerun
+    if 'basenames' not in st.session_state:
+        st.session_state.basenames = metadata_df['filename'].map(os.path.basename).tolist()
+    # Labels are int8 arrays (1 byte per image) with UNSET for "not coded"
+    if 'coded_labels' not in st.session_state:
+        coded_labels = np.full(len(metadata_df), UNSET, dtype=np.int8)
+        context_labels = np.full(len(metadata_df), UNSET, dtype=np.int8)
+        # Fill both arrays straight from the saved rows in a single pass
+        for idx, group_label, context in get_progress_store().load():
+            if idx < len(metadata_df):
+                if group_label is not None:
+                    coded_labels[idx] = group_label
+                if context is not None:
+                    context_labels[idx] = context
+        st.session_state.coded_labels = coded_labels
+        st.session_state.context_labels = context_labels
     
-    with col2:
-        st.write("**Context Categories:**")
-        if context_counts:
-            for code, count in sorted(context_counts.items()):
-                st.write(f"• {CONTEXT_CATEGORIES[code]}: {count} images")
-        else:
-            st.write("No context labels assigned")
-    # Export button
-    if coded_count == total_images:
-        st.success("🎉 All images have been coded!")
-        if st.button("💾 Prepare Final Results for Download", type="primary"):
-            # Convert progress data to list format
-            final_labels = []
-            final_context = []
-            for i in range(total_images):
-                if str(i) in progress_data:
-                    if isinstance(progress_data[str(i)], dict):
-                        final_labels.append(progress_data[str(i)].get('group_label'))
-                        final_context.append(progress_data[str(i)].get('context'))
-                    else:
-                        # Handle old format (just group label)
-                        final_labels.append(progress_data[str(i)])
-                        final_context.append(None)
-                else:
-                    final_labels.append(None)
-                    final_context.append(None)
-            
-            save_final_results(metadata_df, final_labels, final_context)
-    else:
-        st.info(f"Complete coding all {total_images} images to export final results.")
+    # Per-code counts for the summary, updated alongside every label change
+    if 'label_counts' not in st.session_state:
+        st.session_state.label_counts = count_labels(st.session_state.coded_labels)
+        st.session_state.context_counts = count_labels(st.session_state.context_labels)
     
-    # Download progress backup
-    st.markdown("---")
+    # Sorted uncoded indices, kept in step with coded_labels on every change
+    if 'uncoded_indices' not in st.session_state:
+        st.session_state.uncoded_indices = np.flatnonzero(
+            st.session_state.coded_labels == UNSET
+        ).tolist()
+    uncoded_indices = st.session_state.uncoded_indices
+    
+    # Auto-jump to first uncoded image on app start
+    if 'has_auto_jumped' not in st.session_state:
+        st.session_state.has_auto_jumped = True
+        if uncoded_indices:
+            st.session_state.current_index = uncoded_indices[0]
+    
+    total_images = len(metadata_df)
+    current_idx = st.session_state.current_index
     
-    # Always available download section
-    st.subheader("💾 Download Progress")
+    # Progress display
+    # uncoded_indices is maintained on every change, so this is O(1)
+    coded_count = total_images - len(uncoded_indices)
+    progress_percent = coded_count / total_images
     
-    col1, col2 = st.columns(2)
+    st.markdown("---")
+    col1, col2, col3 = st.columns([2, 1, 1])
     
     with col1:
-        if st.button("📥 Download Progress Backup (JSON)"):
-            progress_json = json.dumps(progress_data, indent=2)
-            st.download_button(
-                label="📁 Download backup.json",
-                data=progress_json,
-                file_name=f"coding_progress_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                mime="application/json"
-            )
+        st.progress(progress_percent)
+        st.write(f"Progress: {coded_count}/{total_images} images coded ({progress_percent:.1%})")
     
+    # Navigation moves the index in on_click callbacks, so a click costs one
+    # run of the script instead of a run followed by st.rerun()
     with col2:
-        if st.button("📊 Download Current Results (CSV)"):
-            # Convert current progress to CSV format
-            current_labels = []
-            current_context = []
-            for i in range(total_images):
-                if str(i) in progress_data:
-                    if isinstance(progress_data[str(i)], dict):
-                        current_labels.append(progress_data[str(i)].get('group_label'))
-                        current_context.append(progress_data[str(i)].get('context'))
-                    else:
-                        # Handle old format
-                        current_labels.append(progress_data[str(i)])
-                        current_context.append(None)
+        st.button("⬅️ Previous", disabled=(current_idx == 0),
+                  on_click=go_to_image, args=(max(0, current_idx - 1),))
+    
+    with col3:
+        st.button("➡️ Next", disabled=(current_idx >= total_images - 1),
+                  on_click=go_to_image, args=(min(total_images - 1, current_idx + 1),))
+    
+    # Lazy tabs: only the selected tab's body runs, so the image is only
+    # fetched and decoded while the Code tab is open
+    code_tab, summary_tab, export_tab = st.tabs(
+        ["🖼️ Code", "📊 Summary", "💾 Export"], key="main_tab", on_change="rerun"
+    )
+    
+    if code_tab.open:
+        with code_tab:
+            # Jump to specific image
+            with st.expander("Jump to specific image"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    jump_to = st.number_input("Go to image number:", min_value=1, max_value=total_images, value=current_idx + 1)
+                    if st.button("Go"):
+                        st.session_state.current_index = jump_to - 1
+                        st.rerun()
+                with col2:
+                    if st.button("🎯 Go to next uncoded"):
+                        # Find next uncoded image after the current position
+                        pos = bisect.bisect_right(uncoded_indices, current_idx)
+                        next_uncoded = uncoded_indices[pos] if pos < len(uncoded_indices) else None
+                        if next_uncoded is not None:
+                            st.session_state.current_index = next_uncoded
+                            st.rerun()
+                        else:
+                            st.info("No uncoded images found after current position")
+            
+            st.markdown("---")
+            
+            # Current image and coding controls (reruns on its own when clicked)
+            coding_panel(archive)
+    
+    if summary_tab.open:
+        with summary_tab:
+            # Counts are maintained on every change, so there's nothing to scan here
+            label_counts = st.session_state.label_counts
+            context_counts = st.session_state.context_counts
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.write("**People Categories:**")
+                if label_counts:
+                    for code, count in sorted(label_counts.items()):
+                        st.write(f"• {CATEGORIES[code]}: {count} images")
                 else:
-                    current_labels.append(None)
-                    current_context.append(None)
+                    st.write("No images coded yet")
             
-            # Create a copy of the metadata and add coding columns
-            export_df = metadata_df.copy()
-            export_df['group_labels'] = current_labels
-            export_df['context_labels'] = current_context
-            export_df['coding_timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            export_df['completion_status'] = f"{coded_count}/{total_images} images coded"
+            with col2:
+                st.write("**Context Categories:**")
+                if context_counts:
+                    for code, count in sorted(context_counts.items()):
+                        st.write(f"• {CONTEXT_CATEGORIES[code]}: {count} images")
+                else:
+                    st.write("No context labels assigned")
+    
+    if export_tab.open:
+        with export_tab:
+            # Export button
+            if coded_count == total_images:
+                st.success("🎉 All images have been coded!")
+                if st.button("💾 Prepare Final Results for Download", type="primary"):
+                    # The session label arrays hold every saved label, so export them directly
+                    save_final_results(metadata_df, st.session_state.coded_labels, st.session_state.context_labels)
+            else:
+                st.info(f"Complete coding all {total_images} images to export final results.")
             
-            # Convert to CSV
-            csv_data = export_df.to_csv(index=False)
+            # Download progress backup
+            st.markdown("---")
             
-            st.download_button(
-                label="📊 Download current-results.csv",
-                data=csv_data,
-                file_name=f"ra-shingle-progress_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv"
-            )
+            # Always available download section
+            st.subheader("💾 Download Progress")
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                # Deferred: the backup is only serialized when the download is clicked
+                st.download_button(
+                    label="📥 Download Progress Backup (JSON)",
+                    data=functools.partial(progress_backup_json, get_progress_store()),
+                    file_name=f"coding_progress_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                    mime="application/json"
+                )
+            
+            with col2:
+                if st.button("📊 Download Current Results (CSV)"):
+                    # metadata_df is this run's own copy from the cache, so add the
+                    # coding columns in place (as save_final_results does) rather
+                    # than copying every metadata column into a new frame
+                    metadata_df['group_labels'] = label_column(st.session_state.coded_labels)
+                    metadata_df['context_labels'] = label_column(st.session_state.context_labels)
+                    metadata_df['coding_timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    metadata_df['completion_status'] = f"{coded_count}/{total_images} images coded"
+                    
+                    # Convert to CSV
+                    csv_data = save_to_cloud_csv(metadata_df)
+                    
+                    if csv_data:
+                        st.download_button(
+                            label="📊 Download current-results.csv",
+                            data=csv_data,
+                            file_name=f"ra-shingle-progress_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                            mime="text/csv"
+                        )
 
 if __name__ == "__main__":
     main()